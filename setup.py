@@ -1,10 +1,11 @@
 from setuptools import setup
 import setuptools
-import pip
 import os
 import re
-from pip._internal.req import parse_requirements
+import sys
+import warnings
 from pathlib import Path
+from setuptools.command.build_ext import build_ext
 
 this_directory = Path(__file__).parent
 
@@ -21,12 +22,50 @@ else:
 links = []
 requires = []
 
-requirements = parse_requirements('requirements.txt', session='hack')
-requirements = list(requirements) 
+with open(this_directory / 'requirements.txt') as f:
+    requirements = [l.strip() for l in f if l.strip() and not l.strip().startswith('#')]
+
+# Optional compiled bootstrap kernels, built when Cython is available
+ext_modules = []
 try:
-    requirements = [str(ir.req) for ir in requirements]
-except:
-    requirements = [str(ir.requirement) for ir in requirements]
+    from Cython.Build import cythonize
+except ImportError:
+    cythonize = None
+
+if cythonize is not None:
+    if sys.platform=='win32':
+        openmp_compile,openmp_link = ['/openmp'],[]
+    elif sys.platform=='darwin':
+        openmp_compile,openmp_link = [],[]
+    else:
+        openmp_compile,openmp_link = ['-fopenmp'],['-fopenmp']
+    ext_modules = cythonize([setuptools.Extension('step_by_step_ks._ks', ['step_by_step_ks/_ks.pyx'], extra_compile_args=openmp_compile, extra_link_args=openmp_link)])
+
+class optional_build_ext(build_ext):
+
+    """
+    Build the compiled kernels when possible. Without a working compiler the
+    package is installed without them and falls back to numba or numpy.
+    """
+
+    def run(self):
+        try:
+            super().run()
+        except Exception as e:
+            warnings.warn(f'Could not build the compiled kernels ({e}), falling back to pure Python.')
+
+    def build_extension(self, ext):
+        try:
+            super().build_extension(ext)
+            return
+        except Exception:
+            pass
+        # retry without OpenMP: the kernels then run serially
+        ext.extra_compile_args,ext.extra_link_args = [],[]
+        try:
+            super().build_extension(ext)
+        except Exception as e:
+            warnings.warn(f'Could not build {ext.name} ({e}), falling back to pure Python.')
 
 setup(name='step_by_step_ks',
 			version=verstr,
@@ -41,5 +80,7 @@ setup(name='step_by_step_ks',
 			packages=setuptools.find_packages(),
 			zip_safe=False,
 			install_requires = requirements,
+			ext_modules = ext_modules,
+			cmdclass = {'build_ext': optional_build_ext},
 			)
 
@@ -0,0 +1,83 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+
+"""
+Compiled bootstrap kernels, ahead-of-time counterparts of the numba kernels of `core`.
+
+The membership arrays are boolean arrays viewed as uint8 (no copy). The
+statistics are written into `out`, of length nloop.
+"""
+
+from cython.parallel import prange
+
+
+def ks_batch(const unsigned char[:, ::1] in1, const unsigned char[:, ::1] in2, const unsigned char[::1] last, Py_ssize_t n1, Py_ssize_t n2, double sign, double reference_stat, bint collect_stats, double[::1] out):
+
+    """
+    Same as `core._ks_batch`, writing the statistic of each row into `out`.
+    """
+
+    cdef Py_ssize_t nloop = in1.shape[0]
+    cdef Py_ssize_t N = in1.shape[1]
+    cdef Py_ssize_t r, k, c1, c2
+    cdef double d, diff
+
+    for r in prange(nloop, nogil=True):
+        c1 = 0
+        c2 = 0
+        d = 0.0
+        for k in range(N):
+            c1 = c1 + in1[r,k]
+            c2 = c2 + in2[r,k]
+            if last[k]:
+                diff = sign*(<double>c1/n1 - <double>c2/n2)
+                if diff > d:
+                    d = diff
+                    if d >= reference_stat and not collect_stats:
+                        break
+        out[r] = d
+
+
+def ks_batch_permutation(const unsigned char[:, ::1] in1, const unsigned char[::1] last, Py_ssize_t n1, Py_ssize_t n2, double sign, double reference_stat, bint collect_stats, double[::1] out):
+
+    """
+    Same as `core._ks_batch_permutation`, writing the statistic of each row into `out`.
+    """
+
+    cdef Py_ssize_t nloop = in1.shape[0]
+    cdef Py_ssize_t N = in1.shape[1]
+    cdef Py_ssize_t r, k, c1
+    cdef double d, diff
+
+    for r in prange(nloop, nogil=True):
+        c1 = 0
+        d = 0.0
+        for k in range(N):
+            c1 = c1 + in1[r,k]
+            if last[k]:
+                diff = sign*(<double>c1/n1 - <double>(k+1-c1)/n2)
+                if diff > d:
+                    d = diff
+                    if d >= reference_stat and not collect_stats:
+                        break
+        out[r] = d
+
+
+cdef extern from *:
+    """
+    #ifdef _OPENMP
+    #include <omp.h>
+    static void _set_omp_threads(int n) { omp_set_num_threads(n); }
+    #else
+    static void _set_omp_threads(int n) { (void)n; }
+    #endif
+    """
+    void _set_omp_threads(int n) nogil
+
+
+def set_num_threads(int n):
+
+    """
+    Set the number of OpenMP threads of the kernels above, a no-op when built without OpenMP.
+    """
+
+    _set_omp_threads(n)
@@ -1,26 +1,45 @@
 import numpy as np
-import matplotlib.pyplot as plt
-from scipy.stats import ecdf
-import random
 import os
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-def randomize(list_in):
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+# compiled kernels, only present when the package was built with Cython
+try:
+    from . import _ks
+except ImportError:
+    _ks = None
+
+# sign of ECDF1 - ECDF2 measured by each alternative
+_ALT_SIGN = {'1 less than 2': 1, '2 greater than 1': 1, '1 greater than 2': -1, '2 less than 1': -1}
+
+# sorted copies of read-only arrays, keyed on id(array), see `_sorted_view`
+_SORTED_CACHE = {}
+
+def randomize(list_in, rng=None):
 
     """
     Randomly shuffles the elements of a given list and returns the shuffled list.
 
-    This function creates a copy of the input list and applies a random shuffle, 
+    This function shuffles a copy of the input with a `numpy.random.Generator`, 
     leaving the original list unchanged.
 
     Parameters
     ----------
-    list_in : list
+    list_in : list or ndarray
         The input list to be shuffled.
+    rng : numpy.random.Generator, optional, default=None
+        The random generator to use. If None, a new one is created.
 
     Returns
     -------
-    list
-        A new list with the elements randomly shuffled.
+    list or ndarray
+        A new list (or ndarray, if an ndarray was given) with the elements randomly shuffled.
 
     Examples
     --------
@@ -33,11 +52,167 @@ def randomize(list_in):
     The input list remains unchanged as the function operates on a copy.
     """
 
-    shuff = list_in.copy()
-    random.shuffle(shuff)
-    return shuff
+    if rng is None:
+        rng = np.random.default_rng()
+
+    if isinstance(list_in, np.ndarray):
+        shuff = list_in.copy()
+        rng.shuffle(shuff)
+        return shuff
+
+    # shuffle indices rather than converting the elements to an array
+    return [list_in[i] for i in rng.permutation(len(list_in))]
+
+def _sorted_view(arr):
+
+    """
+    Return `arr` sorted, reusing the sorted copy of a previous call when possible.
+
+    Only read-only arrays owning their data are cached, since no other array 
+    can modify them in place behind the cache. Making such an array writeable 
+    again and mutating it invalidates the cache. Entries are dropped together 
+    with the array.
+    """
+
+    if arr.flags.writeable or arr.base is not None:
+        return np.sort(arr)
+
+    key = id(arr)
+    entry = _SORTED_CACHE.get(key)
+    if entry is not None and entry[0]() is arr:
+        return entry[1]
+
+    sorted_arr = np.sort(arr)
+    sorted_arr.flags.writeable = False
+    ref = weakref.ref(arr, lambda _, key=key: _SORTED_CACHE.pop(key, None))
+    _SORTED_CACHE[key] = (ref, sorted_arr)
+
+    return sorted_arr
+
+if njit is not None:
+
+    @njit(cache=True)
+    def _merge_sorted_kernel(a, b):
+
+        """
+        Two-pointer merge of two sorted arrays of the same dtype.
+        """
+
+        n1,n2 = len(a),len(b)
+        out = np.empty(n1+n2, dtype=a.dtype)
+        i = 0
+        j = 0
+        while i < n1 and j < n2:
+            if b[j] < a[i]:
+                out[i+j] = b[j]
+                j += 1
+            else:
+                out[i+j] = a[i]
+                i += 1
+        out[i+j:n1+j] = a[i:]
+        out[n1+j:] = b[j:]
+
+        return out
+
+    @njit(cache=True)
+    def _fast_ks_stat(data1, data2):
+
+        """
+        Single sweep over two sorted samples computing both one-sided KS statistics.
+
+        Returns max(ECDF1 - ECDF2), max(ECDF2 - ECDF1) and the first values where 
+        they are reached, exactly as `raw_ks_test` would, but without building the 
+        pooled grid, the ECDFs or their difference.
+        """
+
+        n1,n2 = len(data1),len(data2)
+        stat_pos,stat_neg = -np.inf,-np.inf
+        loc_pos,loc_neg = data1[0],data1[0]
+        i = 0
+        j = 0
+        while i < n1 or j < n2:
+            if j==n2 or (i < n1 and data1[i] <= data2[j]):
+                x = data1[i]
+            else:
+                x = data2[j]
+            while i < n1 and data1[i]==x:
+                i += 1
+            while j < n2 and data2[j]==x:
+                j += 1
+            diff = i/n1 - j/n2
+            if diff > stat_pos:
+                stat_pos,loc_pos = diff,x
+            if -diff > stat_neg:
+                stat_neg,loc_neg = -diff,x
+
+        return stat_pos, stat_neg, loc_pos, loc_neg
+
+else:
+    _merge_sorted_kernel = None
+    _fast_ks_stat = None
+
+def _merge_sorted(a, b):
+
+    """
+    Merge two sorted arrays into a single sorted array in linear time.
+    """
+
+    if _merge_sorted_kernel is not None and a.dtype==b.dtype and a.dtype.kind in 'iuf':
+        return _merge_sorted_kernel(a, b)
+
+    # timsort detects the two sorted runs and only merges them
+    return np.sort(np.concatenate((a,b)), kind='stable')
 
-def raw_ks_test(data1, data2, alternative='1 less than 2', plot=True, save_ecdf_path=None):
+def _is_cupy(data):
+
+    """
+    Check whether `data` is a CuPy array, without importing CuPy.
+    """
+
+    return type(data).__module__.startswith('cupy')
+
+def _asnumpy(data):
+
+    """
+    Convert array-like (including CuPy arrays) data to a numpy array.
+    """
+
+    if _is_cupy(data):
+        import cupy
+        return cupy.asnumpy(data)
+    return np.asarray(data)
+
+def _alternative_sign(alternative):
+
+    """
+    Convert an alternative hypothesis into the sign of ECDF1 - ECDF2 to maximize.
+
+    Raises
+    ------
+    ValueError
+        If `alternative` is not one of the supported hypotheses.
+    """
+
+    sign = _ALT_SIGN.get(alternative)
+    if sign is None:
+        raise ValueError(f"Please set a valid alternative among {list(_ALT_SIGN)}, got {alternative!r}...")
+    return sign
+
+def _check_nan(data):
+
+    """
+    Reject samples containing NaN, which have no place in an ECDF.
+
+    Raises
+    ------
+    ValueError
+        If `data` is a float or complex array containing NaN.
+    """
+
+    if data.dtype.kind in 'fc' and np.isnan(data).any():
+        raise ValueError('The samples must not contain NaN, please remove them...')
+
+def raw_ks_test(data1, data2, alternative='1 less than 2', plot=True, save_ecdf_path=None, _sign=None):
 
     """
     Perform a custom Kolmogorov-Smirnov (KS) test to compare two empirical distributions.
@@ -55,8 +230,8 @@ def raw_ks_test(data1, data2, alternative='1 less than 2', plot=True, save_ecdf_
         The second dataset (empirical distribution) to compare.
     alternative : str, optional, default='1 less than 2'
         Specifies the alternative hypothesis for the test. 
-        - '1 less than 2' or '2 more than 1': Test if distribution 1 is generally less than distribution 2.
-        - '1 more than 2' or '2 less than 1': Test if distribution 1 is generally greater than distribution 2.
+        - '1 less than 2' or '2 greater than 1': Test if distribution 1 is generally less than distribution 2.
+        - '1 greater than 2' or '2 less than 1': Test if distribution 1 is generally greater than distribution 2.
     plot : bool, optional, default=True
         If True, generates a plot of the ECDFs and the KS statistic.
 
@@ -73,8 +248,11 @@ def raw_ks_test(data1, data2, alternative='1 less than 2', plot=True, save_ecdf_
     -----
     - This is a one-sided KS test that evaluates the alternative hypothesis based 
       on whether one distribution is greater or less than the other.
-    - The ECDFs are generated from the input data and evaluated at all unique values 
-      in the combined dataset.
+    - The ECDFs are evaluated at all values of the combined dataset directly from the 
+      sorted data, with one `np.searchsorted` per dataset.
+    - Read-only arrays (e.g. after `data.setflags(write=False)`) are sorted once and the 
+      sorted copy is reused across calls, which saves time when testing several 
+      alternatives on the same data. Do not make them writeable again to modify them.
 
     Example
     -------
@@ -86,40 +264,45 @@ def raw_ks_test(data1, data2, alternative='1 less than 2', plot=True, save_ecdf_
     
     """
 
-    data1 = np.sort(data1)
-    ecdf1 = ecdf(data1)
-
-    data2 = np.sort(data2)
-    ecdf2 = ecdf(data2)
+    data1 = _sorted_view(_asnumpy(data1))
+    data2 = _sorted_view(_asnumpy(data2))
+    sign = _alternative_sign(alternative) if _sign is None else _sign
+    # NaN is unordered: it would stall the single-pass kernel and skew the searchsorted ECDFs
+    _check_nan(data1)
+    _check_nan(data2)
+
+    if not plot and _fast_ks_stat is not None and data1.dtype==data2.dtype and data1.dtype.kind in 'iuf':
+        # no curve to draw: single pass without the intermediate arrays
+        stat_pos,stat_neg,loc_pos,loc_neg = _fast_ks_stat(data1, data2)
+        if sign==1:
+            return {"stat": np.float64(stat_pos), "location": data1.dtype.type(loc_pos)}
+        return {"stat": np.float64(stat_neg), "location": data1.dtype.type(loc_neg)}
     
     size1,size2 = len(data1),len(data2)
-    all_x = np.sort(np.concatenate((data1,data2)))
+    all_x = _merge_sorted(data1, data2)
 
-    if alternative=='1 less than 2' or alternative=='2 greater than 1':
-        diff = ecdf1.cdf.evaluate(all_x) - ecdf2.cdf.evaluate(all_x)
-    elif alternative=='2 less than 1' or alternative=='1 greater than 2':
-        diff = ecdf2.cdf.evaluate(all_x) - ecdf1.cdf.evaluate(all_x) 
-    else:
-        print('Please set a valid alternative...')
-        os.abort()
-    # elif alternative=='1 greater than 2' or '2 less than 1':
-    #   diff = ecdf2.cdf.evaluate(all_x) - ecdf1.cdf.evaluate(all_x)    
+    # ECDFs evaluated on the pooled points, P(X <= x)
+    cdf1 = np.searchsorted(data1, all_x, side='right') / size1
+    cdf2 = np.searchsorted(data2, all_x, side='right') / size2
 
-    
-    peak = all_x[np.argmax(diff)]
-    stat = max(diff)
+    diff = sign*(cdf1 - cdf2)
+
+    idx = int(np.argmax(diff))
+    peak = all_x[idx]
+    stat = diff[idx]
 
     if plot:
+        # imported here so that workers and non-plotting calls skip the matplotlib import
+        import matplotlib.pyplot as plt
         fig,ax = plt.subplots(1,1,figsize=(4,3))
-        ax.plot(all_x, ecdf1.cdf.evaluate(all_x),label='dist 1')
-        ax.plot(all_x, ecdf2.cdf.evaluate(all_x),label="dist 2")
+        ax.plot(all_x, cdf1,label='dist 1')
+        ax.plot(all_x, cdf2,label="dist 2")
         ax.plot(all_x, diff, label="(1) - (2)")
         ax.spines['top'].set_visible(False)
         ax.spines['right'].set_visible(False)
         ax.set_xlabel('total dist')
         ax.set_ylabel('prob(x <= X)')
-        ymin,ymax = ax.get_ylim()
-        ax.vlines(peak,ecdf2.cdf.evaluate(peak),ecdf1.cdf.evaluate(peak),color='k',linestyle='--',label=f'S = {round(stat,3)}\nxS = {round(peak,3)}')
+        ax.vlines(peak,cdf2[idx],cdf1[idx],color='k',linestyle='--',label=f'S = {round(stat,3)}\nxS = {round(peak,3)}')
         ax.legend()
         plt.tight_layout()
         if save_ecdf_path is not None:
@@ -128,7 +311,275 @@ def raw_ks_test(data1, data2, alternative='1 less than 2', plot=True, save_ecdf_
     
     return {"stat": stat, "location": peak}
 
-def bootstrap_pvalue(data1, data2, reference_stat, alternative="1 less than 2", nloop=1000, respect_ratio=True, replacement=False, bootstrap_size=None, plot=True, save_stat_distribution_path=None, *args):
+def _ks_stat_batch(in1, in2, last, n1, n2, sign=1):
+
+    """
+    Compute the one-sided KS statistic for each row of two batches of samples.
+
+    The samples are described by their membership over the sorted pooled data, 
+    so the ECDFs reduce to cumulative counts and no sort is needed. Only array 
+    methods are used, so that the batches may also be CuPy arrays.
+
+    Parameters
+    ----------
+    in1 : ndarray of bool, shape (nloop, N)
+        True where a point of the sorted pooled data belongs to the first sample.
+    in2 : ndarray of bool, shape (nloop, N)
+        True where a point of the sorted pooled data belongs to the second sample.
+    last : ndarray of bool, shape (N,)
+        True where a point of the sorted pooled data is the last of tied values.
+    n1, n2 : int
+        The size of the first and second sample.
+    sign : int, optional, default=1
+        +1 to measure max(ECDF1 - ECDF2), -1 to measure max(ECDF2 - ECDF1).
+
+    Returns
+    -------
+    ndarray, shape (nloop,)
+        The KS statistic of each row, identical to `raw_ks_test` applied to the samples.
+    """
+
+    # the ECDFs are only evaluated after the last of tied values
+    cdf1 = in1.cumsum(axis=1)[:, last] / n1
+    cdf2 = in2.cumsum(axis=1)[:, last] / n2
+    diff = sign*(cdf1 - cdf2)
+
+    return diff.max(axis=1)
+
+if njit is not None:
+
+    @njit(parallel=True, cache=True)
+    def _ks_batch(in1, in2, last, n1, n2, sign, reference_stat, collect_stats):
+
+        """
+        Compiled counterpart of `_ks_stat_batch`.
+
+        Each row is scored with a single sweep over the sorted pooled data, 
+        tracking the running ECDF difference and its maximum, without any 
+        temporary array. If `collect_stats` is False, the sweep stops as soon 
+        as `reference_stat` is reached: the returned values are then only 
+        meaningful compared to `reference_stat`.
+        """
+
+        nloop,N = in1.shape
+        out = np.empty(nloop)
+
+        for r in prange(nloop):
+            c1 = 0
+            c2 = 0
+            d = 0.0
+            for k in range(N):
+                if in1[r,k]:
+                    c1 += 1
+                if in2[r,k]:
+                    c2 += 1
+                if last[k]:
+                    diff = sign*(c1/n1 - c2/n2)
+                    if diff > d:
+                        d = diff
+                        if d >= reference_stat and not collect_stats:
+                            break
+            out[r] = d
+
+        return out
+
+    @njit(parallel=True, cache=True)
+    def _ks_batch_permutation(in1, last, n1, n2, sign, reference_stat, collect_stats):
+
+        """
+        `_ks_batch` for shuffles splitting the whole pooled data, where the 
+        second sample is the complement of the first one.
+        """
+
+        nloop,N = in1.shape
+        out = np.empty(nloop)
+
+        for r in prange(nloop):
+            c1 = 0
+            d = 0.0
+            for k in range(N):
+                if in1[r,k]:
+                    c1 += 1
+                if last[k]:
+                    diff = sign*(c1/n1 - (k+1-c1)/n2)
+                    if diff > d:
+                        d = diff
+                        if d >= reference_stat and not collect_stats:
+                            break
+            out[r] = d
+
+        return out
+
+else:
+    _ks_batch = None
+    _ks_batch_permutation = None
+
+def _bootstrap_chunk_permutation(seed, nloop, last, n1, n2, reference_stat, sign, batch, collect_stats):
+
+    """
+    `_bootstrap_chunk` specialized for the default bootstrap, which shuffles the 
+    pooled data and splits it back into samples of the original sizes.
+
+    Only the membership of the first sample is drawn, the second sample being 
+    its complement.
+    """
+
+    rng = np.random.default_rng(seed)
+    N = len(last)
+    batch = max(1, min(nloop, batch))
+    in1 = np.empty((batch, N), dtype=bool)
+
+    s = 0
+    stat_distribution = np.empty(nloop if collect_stats else 0, dtype=np.float64)
+
+    for start in range(0, nloop, batch):
+
+        m = min(batch, nloop-start)
+        i1 = in1[:m]
+
+        # One shuffle of the pooled data per row
+        i1[:] = False
+        i1[:, :n1] = True
+        rng.permuted(i1, axis=1, out=i1)
+
+        if _ks is not None:
+            stats = np.empty(m)
+            _ks.ks_batch_permutation(i1.view(np.uint8), last.view(np.uint8), n1, n2, sign, reference_stat, collect_stats, stats)
+        elif _ks_batch_permutation is not None:
+            stats = _ks_batch_permutation(i1, last, n1, n2, sign, reference_stat, collect_stats)
+        else:
+            stats = _ks_stat_batch(i1, ~i1, last, n1, n2, sign=sign)
+
+        if collect_stats:
+            stat_distribution[start:start+m] = stats
+        s += int((stats>=reference_stat).sum())
+
+    return stat_distribution, s
+
+def _bootstrap_chunk(seed, nloop, last, n1, n2, replacement, reference_stat, sign, batch, collect_stats):
+
+    """
+    Run `nloop` bootstrap iterations on the pooled data with its own random stream.
+
+    Kept at module level so that it can be dispatched to worker processes. 
+    Since the pooled data is sorted once beforehand, only the tie structure 
+    `last` is needed: each iteration draws which sorted points go to each sample.
+    The iterations are processed `batch` rows at a time in reused buffers, so 
+    that peak memory scales with `batch` rather than with `nloop`. Unless 
+    `collect_stats` is True, only the count is kept.
+
+    Returns
+    -------
+    tuple
+        The bootstrap KS statistics (empty unless `collect_stats`) and how many 
+        of them are greater than or equal to `reference_stat`.
+    """
+
+    N = len(last)
+    if not replacement and n1+n2==N:
+        return _bootstrap_chunk_permutation(seed, nloop, last, n1, n2, reference_stat, sign, batch, collect_stats)
+
+    rng = np.random.default_rng(seed)
+    batch = max(1, min(nloop, batch))
+    labels = np.empty((batch, N), dtype=np.int8)
+    in1 = np.empty((batch, N), dtype=bool)
+    in2 = np.empty((batch, N), dtype=bool)
+
+    s = 0
+    stat_distribution = np.empty(nloop if collect_stats else 0, dtype=np.float64)
+
+    for start in range(0, nloop, batch):
+
+        m = min(batch, nloop-start)
+        lab,i1,i2 = labels[:m],in1[:m],in2[:m]
+
+        # One shuffle of the pooled data per row
+        lab[:] = 0
+        lab[:, :n1] = 1
+        if not replacement:
+            lab[:, n1:n1+n2] = 2
+            rng.permuted(lab, axis=1, out=lab)
+            np.equal(lab, 1, out=i1)
+            np.equal(lab, 2, out=i2)
+        else:
+            rng.permuted(lab, axis=1, out=lab)
+            np.equal(lab, 1, out=i1)
+            lab[:] = 0
+            lab[:, :n2] = 1
+            rng.permuted(lab, axis=1, out=lab)
+            np.equal(lab, 1, out=i2)
+
+        if _ks is not None:
+            stats = np.empty(m)
+            _ks.ks_batch(i1.view(np.uint8), i2.view(np.uint8), last.view(np.uint8), n1, n2, sign, reference_stat, collect_stats, stats)
+        elif _ks_batch is not None:
+            stats = _ks_batch(i1, i2, last, n1, n2, sign, reference_stat, collect_stats)
+        else:
+            stats = _ks_stat_batch(i1, i2, last, n1, n2, sign=sign)
+
+        if collect_stats:
+            stat_distribution[start:start+m] = stats
+        s += int((stats>=reference_stat).sum())
+
+    return stat_distribution, s
+
+def _bootstrap_chunk_cupy(seed, nloop, last, n1, n2, replacement, reference_stat, sign, batch, collect_stats):
+
+    """
+    GPU counterpart of `_bootstrap_chunk`, running the batches with CuPy.
+
+    Each row is shuffled by ranking random keys, the membership of the sorted 
+    pooled points following from the ranks.
+    """
+
+    # imported here: CuPy is slow to import and only needed on this path
+    import cupy
+
+    rng = cupy.random.default_rng(int(seed.generate_state(1)[0]))
+    last = cupy.asarray(last)
+    N = len(last)
+    batch = max(1, min(nloop, batch))
+
+    s = 0
+    stat_distribution = np.empty(nloop if collect_stats else 0, dtype=np.float64)
+
+    for start in range(0, nloop, batch):
+
+        m = min(batch, nloop-start)
+
+        # One shuffle of the pooled data per row
+        rank = cupy.argsort(rng.random((m, N)), axis=1)
+        in1 = rank < n1
+        if not replacement:
+            in2 = (rank >= n1) & (rank < n1+n2)
+        else:
+            rank = cupy.argsort(rng.random((m, N)), axis=1)
+            in2 = rank < n2
+
+        stats = _ks_stat_batch(in1, in2, last, n1, n2, sign=sign)
+
+        if collect_stats:
+            stat_distribution[start:start+m] = cupy.asnumpy(stats)
+        s += int((stats>=reference_stat).sum())
+
+    return stat_distribution, s
+
+def _init_worker(threads):
+
+    """
+    Initializer of the bootstrap worker processes.
+
+    The compiled kernels use every core by default: each worker is limited to 
+    its share of them, so that the workers do not oversubscribe the machine.
+    """
+
+    if njit is not None:
+        import numba
+        numba.set_num_threads(min(threads, numba.config.NUMBA_NUM_THREADS))
+    if _ks is not None:
+        _ks.set_num_threads(threads)
+
+def bootstrap_pvalue(data1, data2, reference_stat, alternative="1 less than 2", nloop=1000, respect_ratio=True, replacement=False, bootstrap_size=None, plot=True, save_stat_distribution_path=None, workers=1, batch=None, random_state=None, backend=None, *args):
 
     """
     Estimate the p-value using a bootstrap method based on the KS statistic.
@@ -160,6 +611,20 @@ def bootstrap_pvalue(data1, data2, reference_stat, alternative="1 less than 2",
         If specified, this sets the size of the bootstrap samples to be drawn. If None, the size of the original data is used.
     plot : bool, optional, default=True
         If True, a histogram of the KS statistics from the bootstrap samples is plotted along with the reference KS statistic.
+    workers : int, optional, default=1
+        Number of processes sharing the bootstrap iterations. Each worker draws from an independent random stream. 
+        The workers are started with the 'spawn' method on every platform, so with workers > 1 the calling script 
+        must protect its entry point with `if __name__ == "__main__":`, and the call cannot be made from code 
+        piped through stdin. The compiled kernels already run on every core: each worker then uses 
+        its share of the cores, so workers > 1 mostly pays off with the pure numpy fallback.
+    batch : int, optional, default=None
+        Number of bootstrap iterations processed at once, which bounds the memory used to O(batch * N) for N pooled points. 
+        If None, it is set to about 4 million pooled points per batch.
+    random_state : int, numpy.random.SeedSequence or numpy.random.Generator, optional, default=None
+        Seed of the bootstrap. For a given seed and number of workers, the p-value is reproducible. If None, fresh entropy is used.
+    backend : {'numpy', 'cupy'}, optional, default=None
+        Array library running the bootstrap batches. 'cupy' runs them on the GPU, with a single worker. 
+        If None, 'cupy' is used when `data1` or `data2` is a CuPy array, 'numpy' otherwise.
 
     Returns
     -------
@@ -170,8 +635,12 @@ def bootstrap_pvalue(data1, data2, reference_stat, alternative="1 less than 2",
     -----
     - The bootstrap method shuffles and resamples the combined data from `data1` and `data2`, 
       recalculating the KS statistic to generate a distribution of statistics.
+    - The shuffles are drawn with a `numpy.random.Generator` directly on the pooled ndarray. 
+      `randomize` is kept for backward compatibility but is not used by the bootstrap.
     - The p-value is computed as the fraction of bootstrap statistics that are greater than or 
       equal to the reference statistic.
+    - Since a KS statistic lies between 0 and 1, a `reference_stat` <= 0 gives a p-value of 1 and 
+      a `reference_stat` > 1 a p-value of 0. Without plot, these are returned without bootstrap.
 
     Example
     -------
@@ -182,43 +651,83 @@ def bootstrap_pvalue(data1, data2, reference_stat, alternative="1 less than 2",
     >>> print(f"P-value: {pvalue}")
     """
     
+    if backend is None:
+        backend = 'cupy' if _is_cupy(data1) or _is_cupy(data2) else 'numpy'
+    if backend not in ('numpy', 'cupy'):
+        raise ValueError(f"Please set backend to 'numpy' or 'cupy', got {backend!r}...")
+    if backend=='cupy':
+        if workers!=1:
+            raise ValueError("The 'cupy' backend runs with a single worker...")
+        try:
+            import cupy
+        except ImportError:
+            raise ValueError("The 'cupy' backend requires CuPy to be installed...")
+
+    data1,data2 = _asnumpy(data1),_asnumpy(data2)
+    _check_nan(data1)
+    _check_nan(data2)
+
     size1,size2 = len(data1),len(data2)
-    all_x = list(np.concatenate((data1, data2),axis=0))
-    
-    s=0
-    stat_distribution = []
-    
-    for i in range(nloop):
-        
-        # For each loop shuffle
-        if respect_ratio:
-            shuffled = randomize(all_x)   
-            d1 = shuffled[:size1]
-            if not replacement:
-                d2 = shuffled[size1:]
-            else:
-                shuffled2 = randomize(all_x)
-                d2 = shuffled2[:size12]
-        
-        if isinstance(bootstrap_size, int):
-            shuffled = randomize(all_x) 
-            d1 = shuffled[:bootstrap_size]
-            if not replacement:
-                d2 = shuffled[bootstrap_size:(int(2*bootstrap_size))]
-            else:
-                shuffled2 = randomize(all_x)
-                d2 = shuffled2[:bootstrap_size]
-        
-        test = raw_ks_test(d1, d2, alternative=alternative, plot=False)
-        stat = test['stat']
-        
-        stat_distribution.append(stat)
-        if stat>=reference_stat:
-            s+=1
+    N = size1+size2
+    sign = _alternative_sign(alternative)
+
+    if isinstance(bootstrap_size, int):
+        n1,n2 = min(bootstrap_size,N),bootstrap_size
+    elif respect_ratio:
+        n1,n2 = size1,size2
+    else:
+        raise ValueError('Please set a bootstrap_size or respect_ratio=True...')
+    n2 = min(n2, N) if replacement else min(n2, N-n1)
+    if n2 < 1:
+        raise ValueError('bootstrap_size is too large to draw two samples from the pooled data...')
+
+    # every KS statistic lies in [0, 1]: the p-value is known without resampling
+    if plot!=True and reference_stat <= 0.0:
+        return 1.0
+    if plot!=True and reference_stat > 1.0:
+        return 0.0
+
+    pooled = np.sort(np.concatenate((data1, data2),axis=0))
+
+    # sort once: every resample is a subset of the sorted pooled data
+    last = np.ones(N, dtype=bool)
+    last[:-1] = pooled[:-1]!=pooled[1:]
+
+    if batch is None:
+        batch = max(1, min(nloop, 4_000_000 // N))
+
+    # Independent random streams, one per worker
+    if isinstance(random_state, np.random.Generator):
+        random_state = int(random_state.integers(2**63))
+    if isinstance(random_state, np.random.SeedSequence):
+        # spawn from a copy: spawning advances the caller's sequence
+        random_state = np.random.SeedSequence(random_state.entropy, spawn_key=random_state.spawn_key, pool_size=random_state.pool_size)
+    else:
+        random_state = np.random.SeedSequence(random_state)
+    seeds = random_state.spawn(workers)
+    chunks = [len(c) for c in np.array_split(np.arange(nloop), workers)]
+    # the statistics themselves are only needed for the histogram
+    chunk_args = (last, n1, n2, replacement, reference_stat, sign, batch, plot==True)
+
+    if backend=='cupy':
+        results = [_bootstrap_chunk_cupy(seeds[0], chunks[0], *chunk_args)]
+    elif workers==1:
+        results = [_bootstrap_chunk(seeds[0], chunks[0], *chunk_args)]
+    else:
+        # spawn rather than fork: forking after the numba thread pool started can deadlock
+        context = multiprocessing.get_context('spawn')
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker, initargs=(threads,)) as executor:
+            futures = [executor.submit(_bootstrap_chunk, seed, n, *chunk_args) for seed,n in zip(seeds,chunks)]
+            results = [f.result() for f in futures]
+
+    stat_distribution = np.concatenate([r[0] for r in results])
+    s = sum(r[1] for r in results)
     
     pvalue = s/nloop
     
     if plot==True:
+        import matplotlib.pyplot as plt
         fig,ax = plt.subplots(1,1,figsize=(4,3))
         ax.hist(stat_distribution, alpha=0.6)
         ymin,ymax = ax.get_ylim()
@@ -234,7 +743,7 @@ def bootstrap_pvalue(data1, data2, reference_stat, alternative="1 less than 2",
     
     return pvalue
 
-def ks_test(data1, data2, alternative='1 less than 2', plot_ecdf=False, bootstrap_loops=1000, bootstrap_respect_ratio=True, bootstrap_replacement=False, bootstrap_size=None, bootstrap_plot=True, save_ecdf_path=None, save_stat_distribution_path=None):
+def ks_test(data1, data2, alternative='1 less than 2', plot_ecdf=False, bootstrap_loops=1000, bootstrap_respect_ratio=True, bootstrap_replacement=False, bootstrap_size=None, bootstrap_plot=True, save_ecdf_path=None, save_stat_distribution_path=None, bootstrap_workers=1, bootstrap_batch=None, random_state=None, bootstrap_backend=None):
     
     """
     Performs a two-sample Kolmogorov-Smirnov (KS) test with an optional bootstrap procedure for p-value estimation.
@@ -266,6 +775,15 @@ def ks_test(data1, data2, alternative='1 less than 2', plot_ecdf=False, bootstra
         If specified, this sets the size of the bootstrap samples. If None, the original data sizes are used.
     bootstrap_plot : bool, optional, default=True
         If True, plots the distribution of KS statistics generated by the bootstrap procedure.
+    bootstrap_workers : int, optional, default=1
+        Number of processes sharing the bootstrap iterations. With more than one worker, the calling script must 
+        protect its entry point with `if __name__ == "__main__":` (see `bootstrap_pvalue`).
+    bootstrap_batch : int, optional, default=None
+        Number of bootstrap iterations processed at once, to bound memory. If None, a size is picked from the data size.
+    random_state : int, numpy.random.SeedSequence or numpy.random.Generator, optional, default=None
+        Seed of the bootstrap, to make the p-value reproducible.
+    bootstrap_backend : {'numpy', 'cupy'}, optional, default=None
+        Array library running the bootstrap. If None, 'cupy' is used for CuPy inputs and 'numpy' otherwise.
 
     Returns
     -------
@@ -290,9 +808,10 @@ def ks_test(data1, data2, alternative='1 less than 2', plot_ecdf=False, bootstra
     >>> print(f"KS Statistic: {result['stat']}, P-value: {result['pvalue']}")
     """
     
-    test = raw_ks_test(data1, data2, alternative=alternative, plot=plot_ecdf, save_ecdf_path=save_ecdf_path)
+    sign = _alternative_sign(alternative)
+    test = raw_ks_test(data1, data2, alternative=alternative, plot=plot_ecdf, save_ecdf_path=save_ecdf_path, _sign=sign)
     reference_stat = test['stat']
-    pvalue = bootstrap_pvalue(data1, data2, reference_stat, alternative=alternative, plot=bootstrap_plot, nloop=bootstrap_loops, replacement=bootstrap_replacement, bootstrap_size=bootstrap_size, save_stat_distribution_path=save_stat_distribution_path)
+    pvalue = bootstrap_pvalue(data1, data2, reference_stat, alternative=alternative, plot=bootstrap_plot, nloop=bootstrap_loops, replacement=bootstrap_replacement, bootstrap_size=bootstrap_size, save_stat_distribution_path=save_stat_distribution_path, workers=bootstrap_workers, batch=bootstrap_batch, random_state=random_state, backend=bootstrap_backend)
     test.update({'pvalue': pvalue})
 
     return test
@@ -1,6 +1,11 @@
+import gc
+import sys
+import types
 import unittest
+from unittest import mock
 import numpy as np
 from step_by_step_ks import raw_ks_test, bootstrap_pvalue
+from step_by_step_ks import core
 
 class TestRawKS(unittest.TestCase):
 
@@ -34,13 +39,64 @@ class TestRawKS(unittest.TestCase):
 		test = raw_ks_test(self.dist_no_overlap,self.dist_norm_8, alternative='1 less than 2',plot=False)
 		self.assertEqual(test['stat'], 0.0)
 
+	def test_no_overlap_statistic_odd_size(self):
+
+		# n * (1/n) is not exactly 1 for n=49: the ECDFs must still end at 1.0
+		dist_49 = np.random.normal(8,4, size=49)
+
+		test = raw_ks_test(self.dist_no_overlap, dist_49, alternative='1 less than 2',plot=False)
+		self.assertEqual(test['stat'], 0.0)
+
+		test = raw_ks_test(np.array([30.0]), dist_49, alternative='1 less than 2',plot=False)
+		self.assertEqual(test['stat'], 0.0)
+
+		test = raw_ks_test(self.dist_no_overlap, dist_49, alternative='1 less than 2',plot=True)
+		self.assertEqual(test['stat'], 0.0)
+
+	def test_read_only_input(self):
+
+		data = self.dist_norm_8_bis.copy()
+		data.setflags(write=False)
+		reference = raw_ks_test(self.dist_norm_8, self.dist_norm_8_bis, alternative='1 less than 2',plot=False)
+		for _ in range(2):
+			test = raw_ks_test(self.dist_norm_8, data, alternative='1 less than 2',plot=False)
+			self.assertEqual(test['stat'], reference['stat'])
+			self.assertEqual(test['location'], reference['location'])
+			self.assertIn(id(data), core._SORTED_CACHE)
+
+		# the sorted copy is dropped together with the array
+		key = id(data)
+		del data
+		gc.collect()
+		self.assertNotIn(key, core._SORTED_CACHE)
+
+	def test_invalid_alternative(self):
+
+		with self.assertRaises(ValueError):
+			raw_ks_test(self.dist_norm_8, self.dist_norm_8_bis, alternative='1 different from 2',plot=False)
+
+	def test_nan_input(self):
+
+		with self.assertRaises(ValueError):
+			raw_ks_test(np.array([1.0, 2.0, np.nan]), np.array([1.5, 2.5]), plot=False)
+
+		with self.assertRaises(ValueError):
+			raw_ks_test(np.array([1.5, 2.5]), np.array([1.0, np.nan, 2.0]), alternative='1 greater than 2', plot=False)
+
+		# the numpy fallback must reject them as well
+		with mock.patch.object(core, '_fast_ks_stat', None):
+			with self.assertRaises(ValueError):
+				raw_ks_test(np.array([1.0, 2.0, np.nan]), np.array([1.5, 2.5]), plot=False)
+
 class TestBootstrap(unittest.TestCase):
 
 	@classmethod
 	def setUpClass(self):
-		self.dist_norm_8 = np.random.normal(8,4, size=80)
-		self.dist_norm_8_bis = np.random.normal(8,4, size=100)
-		self.dist_no_overlap = np.random.normal(30,0.5,size=150)
+		# seeded so that the p-values asserted below are deterministic
+		rng = np.random.default_rng(0)
+		self.dist_norm_8 = rng.normal(8,4, size=80)
+		self.dist_norm_8_bis = rng.normal(8,4, size=100)
+		self.dist_no_overlap = rng.normal(30,0.5,size=150)
 		
 		self.test_same = raw_ks_test(self.dist_norm_8, self.dist_norm_8, alternative='1 less than 2', plot=False)
 		self.reference_stat_same = self.test_same['stat']
@@ -56,23 +112,204 @@ class TestBootstrap(unittest.TestCase):
 
 	def test_pvalue_same_is_one(self):
 		
-		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8, reference_stat=self.reference_stat_same, alternative='1 less than 2', nloop=1000, plot=False)
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8, reference_stat=self.reference_stat_same, alternative='1 less than 2', nloop=1000, plot=False, random_state=0)
 		self.assertEqual(pval, 1.0)
 
 	def test_pvalue_similar_is_non_significant(self):
 		
-		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False)
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, random_state=0)
 		self.assertGreater(pval, 0.01)
 
 	def test_pvalue_zero_for_far_distributions(self):
-		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_no_overlap, reference_stat=self.reference_stat_different, alternative='1 less than 2', nloop=1000, plot=False)
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_no_overlap, reference_stat=self.reference_stat_different, alternative='1 less than 2', nloop=1000, plot=False, random_state=0)
 		self.assertEqual(pval, 0.0)
 
 	def test_pvalue_non_significant_different_flipped(self):
 
-		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_no_overlap, reference_stat=self.reference_stat_different_flip, alternative='1 greater than 2', nloop=1000, plot=False)
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_no_overlap, reference_stat=self.reference_stat_different_flip, alternative='1 greater than 2', nloop=1000, plot=False, random_state=0)
 		self.assertEqual(pval, 1.0)		
 
+	def test_pvalue_with_replacement(self):
+
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, replacement=True, random_state=0)
+		self.assertGreater(pval, 0.0)
+		self.assertLess(pval, 1.0)
+
+	def test_pvalue_with_bootstrap_size(self):
+
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, bootstrap_size=50, random_state=0)
+		self.assertGreater(pval, 0.0)
+		self.assertLess(pval, 1.0)
+
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, bootstrap_size=50, replacement=True, random_state=0)
+		self.assertGreater(pval, 0.0)
+		self.assertLess(pval, 1.0)
+
+	def test_pvalue_parallel_workers(self):
+
+		nloop = 1000
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=nloop, plot=False, random_state=0, workers=2)
+		self.assertGreater(pval, 0.01)
+		self.assertLess(pval, 1.0)
+
+		# the two worker streams run in-process must add up to the same p-value
+		pooled = np.sort(np.concatenate((self.dist_norm_8, self.dist_norm_8_bis)))
+		last = np.ones(len(pooled), dtype=bool)
+		last[:-1] = pooled[:-1]!=pooled[1:]
+		n1,n2 = len(self.dist_norm_8),len(self.dist_norm_8_bis)
+		results = [core._bootstrap_chunk(seed, nloop//2, last, n1, n2, False, self.reference_stat_similar, 1, nloop, True) for seed in np.random.SeedSequence(0).spawn(2)]
+		self.assertEqual(sum(len(r[0]) for r in results), nloop)
+		self.assertEqual(pval, sum(r[1] for r in results)/nloop)
+
+	def test_pvalue_reproducible(self):
+
+		pval1 = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, random_state=42)
+		pval2 = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, random_state=42)
+		self.assertEqual(pval1, pval2)
+
+		seed = np.random.SeedSequence(42)
+		pval1 = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, random_state=seed)
+		pval2 = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, random_state=seed)
+		self.assertEqual(pval1, pval2)
+		self.assertEqual(seed.n_children_spawned, 0)
+
+	def test_pvalue_nan_input(self):
+
+		data = np.append(self.dist_norm_8, np.nan)
+		for reference_stat in [0.0, self.reference_stat_similar]:
+			with self.assertRaises(ValueError):
+				bootstrap_pvalue(data, self.dist_norm_8_bis, reference_stat=reference_stat, alternative='1 less than 2', nloop=100, plot=False, random_state=0)
+
+	def test_pvalue_in_batches(self):
+
+		# batching must not change the draw for a given seed
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, random_state=0, batch=1000)
+		for batch in [1, 64, 999]:
+			pval_batch = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, alternative='1 less than 2', nloop=1000, plot=False, random_state=0, batch=batch)
+			self.assertEqual(pval_batch, pval)
+
+
+class TestCupyBackend(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(self):
+		rng = np.random.default_rng(0)
+		self.dist_norm_8 = rng.normal(8,4, size=80)
+		self.dist_norm_8_bis = rng.normal(8,4, size=100)
+		self.dist_no_overlap = rng.normal(30,0.5,size=150)
+		self.reference_stat_similar = raw_ks_test(self.dist_norm_8, self.dist_norm_8_bis, alternative='1 less than 2', plot=False)['stat']
+		self.reference_stat_different = raw_ks_test(self.dist_norm_8, self.dist_no_overlap, alternative='1 less than 2', plot=False)['stat']
+
+		# numpy standing in for CuPy, so that the backend runs without a GPU
+		self.fake_cupy = types.ModuleType('cupy')
+		self.fake_cupy.random = np.random
+		self.fake_cupy.argsort = np.argsort
+		self.fake_cupy.asarray = np.asarray
+		self.fake_cupy.asnumpy = np.asarray
+
+	def pvalues(self, **kwargs):
+
+		# the two backends draw differently: their p-values agree up to the Monte Carlo error
+		pval = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, nloop=2000, plot=False, random_state=0, **kwargs)
+		with mock.patch.dict(sys.modules, {'cupy': self.fake_cupy}):
+			pval_cupy = bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, nloop=2000, plot=False, random_state=0, backend='cupy', **kwargs)
+		self.assertGreater(pval_cupy, 0.0)
+		self.assertLess(pval_cupy, 1.0)
+		self.assertAlmostEqual(pval_cupy, pval, delta=0.05)
+
+	def test_permutation(self):
+
+		self.pvalues()
+		with mock.patch.dict(sys.modules, {'cupy': self.fake_cupy}):
+			pval = bootstrap_pvalue(self.dist_norm_8, self.dist_no_overlap, reference_stat=self.reference_stat_different, nloop=1000, plot=False, random_state=0, backend='cupy')
+		self.assertEqual(pval, 0.0)
+
+	def test_with_bootstrap_size(self):
+
+		self.pvalues(bootstrap_size=50)
+		self.pvalues(bootstrap_size=50, replacement=True)
+
+	def test_with_replacement(self):
+
+		self.pvalues(replacement=True)
+
+	def test_invalid_settings(self):
+
+		with mock.patch.dict(sys.modules, {'cupy': self.fake_cupy}):
+			with self.assertRaises(ValueError):
+				bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, nloop=100, plot=False, backend='cupy', workers=2)
+			with self.assertRaises(ValueError):
+				bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, nloop=100, plot=False, backend='torch')
+
+		# None in sys.modules makes the import fail, as without CuPy installed
+		with mock.patch.dict(sys.modules, {'cupy': None}):
+			with self.assertRaises(ValueError):
+				bootstrap_pvalue(self.dist_norm_8, self.dist_norm_8_bis, reference_stat=self.reference_stat_similar, nloop=100, plot=False, backend='cupy')
+
+
+class TestCompiledKernels(unittest.TestCase):
+
+	@classmethod
+	def setUpClass(self):
+		# rounded to get tied values
+		self.dist1 = np.round(np.random.normal(8,4, size=80), 1)
+		self.dist2 = np.round(np.random.normal(9,3, size=49), 1)
+
+		pooled = np.sort(np.concatenate((self.dist1, self.dist2)))
+		self.last = np.ones(len(pooled), dtype=bool)
+		self.last[:-1] = pooled[:-1]!=pooled[1:]
+
+	def run_both(self, func):
+		# compiled kernels first, then the pure numpy fallback
+		compiled = func()
+		with mock.patch.multiple(core, _ks=None, _ks_batch=None, _ks_batch_permutation=None, _fast_ks_stat=None, _merge_sorted_kernel=None):
+			fallback = func()
+		return compiled, fallback
+
+	@unittest.skipUnless(core._ks_batch is not None, 'numba is not installed')
+	def test_numba_matches_numpy_raw_ks(self):
+
+		for alternative in ['1 less than 2', '1 greater than 2']:
+			compiled, fallback = self.run_both(lambda: raw_ks_test(self.dist1, self.dist2, alternative=alternative, plot=False))
+			self.assertEqual(compiled['stat'], fallback['stat'])
+			self.assertEqual(compiled['location'], fallback['location'])
+
+	@unittest.skipUnless(core._ks_batch is not None, 'numba is not installed')
+	def test_numba_matches_numpy_bootstrap(self):
+
+		with mock.patch.object(core, '_ks', None):
+			self.check_bootstrap_parity()
+
+	@unittest.skipUnless(core._ks_batch is not None, 'numba is not installed')
+	def test_worker_threads(self):
+
+		import multiprocessing
+		import numba
+		from concurrent.futures import ProcessPoolExecutor
+
+		context = multiprocessing.get_context('spawn')
+		with ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=core._init_worker, initargs=(1,)) as executor:
+			self.assertEqual(executor.submit(numba.get_num_threads).result(), 1)
+
+	@unittest.skipUnless(core._ks is not None, 'the Cython extension is not built')
+	def test_cython_matches_numpy_bootstrap(self):
+
+		self.check_bootstrap_parity()
+
+	def check_bootstrap_parity(self):
+
+		n1,n2 = len(self.dist1),len(self.dist2)
+		for sign in [1,-1]:
+			for replacement,(m1,m2) in [(False,(n1,n2)), (True,(n1,n2)), (False,(30,30))]:
+				args = (np.random.SeedSequence(0), 500, self.last, m1, m2, replacement, 0.2, sign, 64, True)
+				(compiled,s_compiled),(fallback,s_fallback) = self.run_both(lambda: core._bootstrap_chunk(*args))
+				self.assertTrue(np.array_equal(compiled, fallback))
+				self.assertEqual(s_compiled, s_fallback)
+
+		reference_stat = raw_ks_test(self.dist1, self.dist2, plot=False)['stat']
+		compiled, fallback = self.run_both(lambda: bootstrap_pvalue(self.dist1, self.dist2, reference_stat, nloop=1000, plot=False, random_state=0))
+		self.assertEqual(compiled, fallback)
+
 
 if __name__=="__main__":
 	unittest.main()
\ No newline at end of file